@@ -5,13 +5,12 @@ import webbrowser
 from argparse import ArgumentParser
 from functools import partial
 from pathlib import Path
-from queue import Empty, Queue
 from subprocess import run, Popen, DEVNULL
-from threading import Thread
+from threading import Event, Lock, Thread
 
 import rumps
 
-from AppKit import NSAttributedString
+from AppKit import NSAttributedString, NSPasteboard, NSPasteboardTypeString
 from Cocoa import NSColor, NSForegroundColorAttributeName
 from Foundation import NSObject
 from PyObjCTools.Conversion import propertyListFromPythonCollection
@@ -39,6 +38,7 @@ from thriftybackup.util import format_size
 # change ~/Library to include-only
 
 CHECK_INTERVAL = 5 * 60     # 5 minutes
+LOOKING_UP = 'Looking up...'   # placeholder for the last backups
 
 
 class BackupDaemon(FileSystemEventHandler):
@@ -48,43 +48,59 @@ class BackupDaemon(FileSystemEventHandler):
         self.echo = echo
         self.progess = progress
         self.dry_run = dry_run
-        self._proxy = AppProxy(app)
-        self._backup_now = Queue(maxsize=1)
+        self.proxy = AppProxy(app)     # also used by the app's own threads
+        # a backup requested by the user; the event wakes up the main loop
+        self._requested_backup = None
+        self._request_lock = Lock()
+        self._wake_up = Event()
+        self._quitting = False
         # watch the configuration file for changes
         self._config_observer = Observer()
         self._config_observer.schedule(self, CONFIG_DIR, recursive=False)
         self._config_observer.start()
         self._last_file_timestamp = None
+        self._configuration = None
+        self._configuration_mtime = None
         self._thread = Thread(target=self._main_loop)
 
     def on_any_event(self, event):
         if Path(event.src_path) == CONFIG_PATH and event.event_type == 'created':
-            self._proxy.reload_config()
+            self.proxy.reload_config()
 
     def _main_loop(self):
         while True:
-            try:
-                backup = self._backup_now.get(timeout=CHECK_INTERVAL)
-                if backup is None:  # app asks to quit
-                    break
-                backup.backup(self._proxy, force=True)
-            except Empty:
+            self._wake_up.wait(timeout=CHECK_INTERVAL)
+            with self._request_lock:
+                self._wake_up.clear()
+                backup, self._requested_backup = self._requested_backup, None
+            if self._quitting:
+                break
+            if backup is not None:
+                backup.backup(self.proxy, force=True)
+            else:
                 for backup in self.configurations:
-                    if backup.backup(self._proxy):
+                    if backup.backup(self.proxy):
                         break   # only continue to next backup if current one is skipped
-            self._proxy.idle()
+            self.proxy.idle()
 
     def start(self):
         self._thread.start()
 
     @property
     def configurations(self):
-        config = Configuration(CONFIG_PATH, echo=self.echo,
-                               progress=self.progess, dry_run=self.dry_run)
-        yield from config.values()
+        # only parse the configuration file again when it has been modified
+        mtime = CONFIG_PATH.stat().st_mtime_ns
+        if mtime != self._configuration_mtime:
+            self._configuration = Configuration(CONFIG_PATH, echo=self.echo,
+                                                progress=self.progess,
+                                                dry_run=self.dry_run)
+            self._configuration_mtime = mtime
+        yield from self._configuration.values()
 
     def backup_now(self, backup):
-        self._backup_now.put(backup)
+        with self._request_lock:
+            self._requested_backup = backup
+            self._wake_up.set()
 
     def abort_backup(self):
         pass    # TODO: call Backup method that calls Popen.terminate()?
@@ -92,7 +108,8 @@ class BackupDaemon(FileSystemEventHandler):
     def shutdown(self):
         self._config_observer.stop()
         self._config_observer.join()
-        self._backup_now.put(None)
+        self._quitting = True
+        self._wake_up.set()
         self._thread.join()
 
 
@@ -108,10 +125,19 @@ class MenuBarApp(rumps.App):
         super().__init__('rclone backup', icon='rclone.icns', template=True,
                          quit_button=None)
         self.total_size = None
+        self.large_entries_size = None
+        self.excluded_size = None
         self.large_entry_menu_items = []
         self.total_size_menu_item = None
         self.progress_menu_item = None
+        self.progress_percentage = None
         self._idling = False
+        self._idle_generation = 0
+        # a single thread looks up the last backups for the latest idle menu
+        self._last_backups_request = None
+        self._last_backups_lock = Lock()
+        self._look_up = Event()
+        Thread(target=self._last_backups_loop, daemon=True).start()
         self.daemon = BackupDaemon(self, echo, progress, dry_run)
         self.daemon.start()
         self.idle()
@@ -142,7 +168,8 @@ class MenuBarApp(rumps.App):
     def idle(self):
         self.title = None
         self.menu.clear()
-        for backup in self.daemon.configurations:     # TODO: slow, run in thread?
+        last_backups_menus = []
+        for backup in self.daemon.configurations:
             menu = self.add_menuitem(backup.name)
             backup_now = partial(self.backup_now, backup=backup)
             self.add_menuitem('Backup now', backup_now, parent=menu)
@@ -151,18 +178,59 @@ class MenuBarApp(rumps.App):
             self.add_menuitem('Edit exclude file', edit_exclude, parent=menu)
             menu.add(rumps.separator)
             self.add_menuitem('Last backups:', parent=menu)
-            for snapshot, size, sync_json in backup.last_backups():
-                size_str = format_size(size, True).replace(' ', '\u2007')
-                show_files = partial(self.show_files, ncdu_export_path=sync_json,
-                                     remote=True)
-                self.add_menuitem(f"{snapshot}\t{size_str}", show_files,
-                                  parent=menu)
+            self.add_menuitem(LOOKING_UP, parent=menu)
+            last_backups_menus.append((backup, menu))
+        self.add_app_menu_items()
+        self._idling = True
+        # listing the backups on the remotes takes a while; don't block the UI
+        with self._last_backups_lock:
+            self._idle_generation += 1
+            self._last_backups_request = (last_backups_menus,
+                                          self._idle_generation)
+            self._look_up.set()
+
+    def _last_backups_loop(self):
+        while True:
+            self._look_up.wait()
+            with self._last_backups_lock:
+                self._look_up.clear()
+                request, self._last_backups_request = \
+                    self._last_backups_request, None
+            last_backups_menus, generation = request
+            for backup, menu in last_backups_menus:
+                # abandon the lookups for a menu that has been replaced
+                if generation != self._idle_generation or not self._idling:
+                    break
+                try:
+                    snapshots = list(backup.last_backups())
+                except (Exception, SystemExit) as exc:
+                    print(f"{backup.name}: could not look up the last backups:"
+                          f" {exc}")
+                    snapshots = None
+                self.daemon.proxy.show_last_backups(menu, snapshots, generation)
+
+    @interface
+    def show_last_backups(self, menu, snapshots, generation):
+        # skip if a backup was started or the menu rebuilt in the meantime
+        if not self._idling or generation != self._idle_generation:
+            return
+        del menu[LOOKING_UP]
+        if snapshots is None:
+            self.add_menuitem('Could not look up the last backups', parent=menu)
+            return
+        for snapshot, size, sync_json in snapshots:
+            size_str = format_size(size, True).replace(' ', '\u2007')
+            show_files = partial(self.show_files, ncdu_export_path=sync_json,
+                                 remote=True)
+            self.add_menuitem(f"{snapshot}\t{size_str}", show_files,
+                              parent=menu)
+
+    def add_app_menu_items(self):
         self.menu.add(rumps.separator)
         self.add_menuitem('Edit configuration', self.edit_config_file, ',')
         self.add_menuitem('Install command-line tool', self.install_thrifty, 'c')
         self.add_menuitem('Quit', self.quit, 'q')
         self.add_menuitem(f'Version {__version__}')
-        self._idling = True
 
     @interface
     def reload_config(self):
@@ -218,6 +286,9 @@ class MenuBarApp(rumps.App):
     def threshold_exceeded(self, backup, total_size, large_entries):
         self.menu.clear()
         self.total_size = total_size
+        self.large_entries_size = sum(entry.transfer_size
+                                      for entry in large_entries)
+        self.excluded_size = 0    # updated along with the selection
         rumps.notification(f"{backup.name}: Backup size exceeds treshold", None,
                            f"Total backup size: {format_size(total_size)}",
                            data=dict(type='threshold_exceeded',
@@ -246,16 +317,19 @@ class MenuBarApp(rumps.App):
     def select_all(self, _):
         for menu_item, _ in self.large_entry_menu_items:
             menu_item.state = True
+        self.excluded_size = 0
         self.update_backup_size()
 
     def deselect_all(self, _):
         for menu_item, _ in self.large_entry_menu_items:
             menu_item.state = False
+        self.excluded_size = self.large_entries_size
         self.update_backup_size()
 
     def invert_selection(self, _):
         for menu_item, _ in self.large_entry_menu_items:
             menu_item.state = not menu_item.state
+        self.excluded_size = self.large_entries_size - self.excluded_size
         self.update_backup_size()
 
     def add_large_menu_item(self, entry, index):
@@ -263,31 +337,30 @@ class MenuBarApp(rumps.App):
             f'{format_size(entry.transfer_size, True)}  {entry.path}',
             key=str(index) if index < 10 else None,
             callback=lambda menu_item:
-                self.large_entry_menu_item_clicked(menu_item, str(entry.path))
+                self.large_entry_menu_item_clicked(menu_item, entry)
         )
         menu_item.state = True
         self.menu.add(menu_item)
         self.large_entry_menu_items.append((menu_item, entry))
 
-    def large_entry_menu_item_clicked(self, menu_item, path):
+    def large_entry_menu_item_clicked(self, menu_item, entry):
         menu_item.state = not menu_item.state
-        run('pbcopy', env={'LANG': 'en_US.UTF-8'}, input=path, text=True)
+        self.excluded_size += (-1 if menu_item.state else 1) * entry.transfer_size
+        pasteboard = NSPasteboard.generalPasteboard()
+        pasteboard.clearContents()
+        pasteboard.setString_forType_(entry.path, NSPasteboardTypeString)
         self.update_backup_size()
 
     def update_backup_size(self):
-        excluded_size = sum(entry.transfer_size
-                            for menu_item, entry in self.large_entry_menu_items
-                            if not menu_item.state)
-        size = self.total_size - excluded_size
+        size = self.total_size - self.excluded_size
         self.total_size_menu_item.title = f'Backup size: {format_size(size)}'
 
     def continue_backup(self, _, backup):
-        exclude = []
+        exclude = [entry for menu_item, entry in self.large_entry_menu_items
+                   if not menu_item.state]
         for menu_item, entry in self.large_entry_menu_items:
             if menu_item.state:
                 print(f'keep {entry.path} ({format_size(entry.transfer_size)})')
-            else:
-                exclude.append(entry)
         backup.continue_backup(exclude)
 
     def skip_backup(self, _, backup):
@@ -296,6 +369,8 @@ class MenuBarApp(rumps.App):
     @interface
     def start_backup(self, backup, total_bytes):
         self.total_bytes = total_bytes
+        self.total_bytes_str = format_size(total_bytes)
+        self.progress_percentage = None
         self.menu.clear()
         self.progress_menu_item = self.add_menuitem('Starting backup...')
         self.add_show_files_menu_item(backup.scout_ncdu_export_path)
@@ -305,9 +380,11 @@ class MenuBarApp(rumps.App):
     @interface
     def update_progress(self, backup, transferred):
         self.progress_menu_item.title = \
-            (f'{backup.name}: {format_size(transferred)}'
-             f' of {format_size(self.total_bytes)}')
-        self.set_title(f'{transferred / self.total_bytes:.0%}')
+            f'{backup.name}: {format_size(transferred)} of {self.total_bytes_str}'
+        percentage = f'{transferred / self.total_bytes:.0%}'
+        if percentage != self.progress_percentage:  # once per percent only
+            self.progress_percentage = percentage
+            self.set_title(percentage)
 
     @interface
     def wrapping_up(self, backup):
@@ -1,21 +1,22 @@
 
 import json
-import plistlib
+import os
 import re
 
-from contextlib import suppress
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timedelta
 from functools import cached_property
 from itertools import chain
 from pathlib import Path
-from queue import Queue
+from queue import Full, Queue
 from subprocess import CompletedProcess, run, Popen, PIPE, CalledProcessError, TimeoutExpired
-from tempfile import TemporaryDirectory
-from time import sleep
+from tempfile import NamedTemporaryFile, TemporaryDirectory
+from threading import Lock, Thread
+from time import monotonic, sleep
 
 from . import CONFIG_DIR, CACHE_DIR
-from .filesystem import Directory, Root
-from .util import format_size
+from .filesystem import Directory, Link, Root
+from .util import format_size, json_loads
 
 
 # - continue with backup while waiting for user decision? (skip large new dir for now)
@@ -42,11 +43,20 @@ from .util import format_size
 # 2) wait for user feedback
 # 3) backup
 
-RE_SNAPSHOT = re.compile('com\.apple\.TimeMachine\.(\d{4}-\d{2}-\d{2}-\d{6})\.local')
+SNAPSHOT_PREFIX = 'com.apple.TimeMachine.'
+SNAPSHOT_SUFFIX = '.local'
+
+
+def snapshot_timestamp(snapshot_name):
+    # com.apple.TimeMachine.2023-07-04-212222.local -> 2023-07-04-212222
+    if not (snapshot_name.startswith(SNAPSHOT_PREFIX)
+            and snapshot_name.endswith(SNAPSHOT_SUFFIX)):
+        raise ValueError(f"Not a Time Machine snapshot: {snapshot_name}")
+    return snapshot_name[len(SNAPSHOT_PREFIX):-len(SNAPSHOT_SUFFIX)]
+
 
 def snapshot_datetime(snapshot_name):
-    timestamp = RE_SNAPSHOT.match(snapshot_name).group(1)
-    return datetime.fromisoformat(timestamp)
+    return datetime.fromisoformat(snapshot_timestamp(snapshot_name))
 
 
 DF = '/bin/df'
@@ -99,8 +109,24 @@ class RcloneMixin:
                         break
                     raise RcloneError(cpe.returncode, log_entry)
 
+    def transfer_files(self, subcmd, names, source, destination):
+        """Copy or move the named files from source to destination
+
+        Passing the file names using --files-from-raw and --no-traverse saves
+        rclone from listing the complete source and destination directories.
+
+        Args:
+          subcmd: the rclone subcommand; 'copy' or 'move'
+          names: the names of the files to transfer, relative to source
+        """
+        with NamedTemporaryFile('wb', suffix='.txt') as files_from:
+            files_from.writelines(name.encode() + b'\n' for name in names)
+            files_from.flush()
+            self.rclone(subcmd, '--files-from-raw', files_from.name,
+                        '--no-traverse', source, destination)
+
     def list_files(self, *include, exclude=None, recursive=True,
-                   dirs_only=False, files_only=False):
+                   dirs_only=False, files_only=False, sort=False):
         args = ((['--dirs-only'] if dirs_only else [])
                 + (['--files-only'] if files_only else [])
                 + [*chain.from_iterable(['--include', inc] for inc in include)]
@@ -108,29 +134,40 @@ class RcloneMixin:
                 + (['--recursive'] if recursive else []))
         list_cmd = self.rclone('lsf', self.destination, '--dir-slash=false',
                                *args, dry_run=False, capture=True)
-        return sorted(list_cmd.stdout.splitlines())
+        paths = list_cmd.stdout.splitlines()
+        return sorted(paths) if sort else paths
+
+
+LAST_BACKUPS_TTL = 60 * 60   # seconds; also catches backups made elsewhere
 
 
 class BackupConfig(RcloneMixin):
 
     def __init__(self, name, source, destination, interval, threshold,
-                 bwlimit=None, rclone='rclone', echo=False, progress=False,
-                 dry_run=False):
+                 bwlimit=None, transfers=None, checkers=None, rclone='rclone',
+                 echo=False, progress=False, dry_run=False):
         self.name = name
         self.source = Path(source)
         self.destination = Path(destination)
         self.interval = interval
         self.threshold = threshold
         self.bwlimit = bwlimit
+        self.transfers = transfers
+        self.checkers = checkers
         self.rclone_path = rclone
         self.echo = echo
         self.progress = progress
         self.dry_run = dry_run
+        self._last_backups = {}     # number -> (time, last_backups() result)
+        self._backups_performed = 0    # invalidates lookups still in progress
 
     @cached_property
     def source_device_volume(self):
-        df = self._run([DF, self.source], encoding='utf-8', check=True,
-                       capture_output=True, echo=self.echo).stdout
+        try:
+            df = self._run([DF, self.source], encoding='utf-8', check=True,
+                           capture_output=True, echo=self.echo).stdout
+        except CalledProcessError as cpe:   # the source path doesn't exist
+            raise VolumeNotMounted(self.source) from cpe
         _, data = df.splitlines()
         device, *_, mounted_on = data.split(maxsplit=8)
         if mounted_on == '/':
@@ -141,13 +178,17 @@ class BackupConfig(RcloneMixin):
     def exclude_file(self):
         return CONFIG_DIR / f'{self.name}.exclude'
 
+    # only the snapshot names are needed from diskutil's plist output
+    RE_SNAPSHOT_NAME = re.compile(rb'<key>SnapshotName</key>\s*'
+                                  rb'<string>([^<]+)</string>')
+
     def get_last_snapshot(self):
         device, _ = self.source_device_volume
         while True:
             output = self._run([DISKUTIL, 'apfs', 'listSnapshots', '-plist', device],
                                echo=self.echo, check=True, capture_output=True).stdout
-            with suppress(IndexError):
-                snapshot = plistlib.loads(output)['Snapshots'][-1]['SnapshotName']
+            if snapshots := self.RE_SNAPSHOT_NAME.findall(output):
+                snapshot = snapshots[-1].decode()
                 if datetime.now() - snapshot_datetime(snapshot) < timedelta(hours=1):
                     break
             self._run([TMUTIL, 'localsnapshot'], echo=self.echo, check=True)
@@ -169,8 +210,29 @@ class BackupConfig(RcloneMixin):
         return last_log
 
     def last_backups(self, number=10):
+        """The last `number` backups as (snapshot, size, sync ncdu export) tuples
+
+        Listing the remote is slow, so the result is kept until this
+        configuration performs a backup or LAST_BACKUPS_TTL expires.
+        """
+        now = monotonic()
         try:
-            snapshots = self.list_files(recursive=False, dirs_only=True)
+            timestamp, last_backups = self._last_backups[number]
+            if now - timestamp < LAST_BACKUPS_TTL:
+                return last_backups
+        except KeyError:
+            pass
+        backups_performed = self._backups_performed
+        last_backups = list(self._find_last_backups(number))
+        # don't cache a listing made before a backup that finished since
+        if backups_performed == self._backups_performed:
+            self._last_backups[number] = now, last_backups
+        return last_backups
+
+    def _find_last_backups(self, number):
+        try:
+            snapshots = self.list_files(recursive=False, dirs_only=True,
+                                        sort=True)
         except RcloneError as exc:
             if exc.log_entry['msg'] == "error listing: directory not found":
                 return
@@ -179,22 +241,44 @@ class BackupConfig(RcloneMixin):
         last_size_file = f'/{self.name}_*_transferred_*'
         size_files = f"/{{{dirs_list}}}/{self.name}_*_transferred_*"
         sizes = self.list_files(last_size_file, size_files, recursive=True,
-                                files_only=True)
+                                files_only=True, sort=True)
         for size_path in reversed(sizes):
             prefix, snapshot, _, size = size_path.rsplit('_', maxsplit=3)
             sync_ncdu_json = self.destination / f'{prefix}_{snapshot}_sync.json'
             yield snapshot, int(size), sync_ncdu_json
 
     def backup(self, app, force=False):
+        """Perform a backup if it is due (or forced)
+
+        Args:
+          app: the app to report to
+          force: back up even if the interval hasn't expired yet
+
+        Returns:
+          True if a backup was performed
+        """
         app.starting(self)
+        # this configuration is reused; the volume might have been remounted
+        vars(self).pop('source_device_volume', None)
         if not (self.interval or force):    # backups without interval set need
             return False                    #  to be started manually
+        # list the remote while the local snapshot is being looked up/created
+        executor = ThreadPoolExecutor(max_workers=1)
         try:
-            device, snapshot = self.get_last_snapshot()
-        except VolumeNotMounted as exc:
-            app.notify_volume_not_mounted(self, exc.volume)
-            return False
-        last_log = self.get_last_log()
+            try:
+                self.source_device_volume   # don't list the remote if unmounted
+                last_log_lookup = executor.submit(self.get_last_log)
+                device, snapshot = self.get_last_snapshot()
+            except VolumeNotMounted as exc:
+                app.notify_volume_not_mounted(self, exc.volume)
+                return False
+            try:
+                last_log = last_log_lookup.result()
+            except (RcloneError, SystemExit) as exc:
+                print(f"{self.name}: could not look up the last backup: {exc}")
+                return False
+        finally:    # don't wait for a lookup that is no longer needed
+            executor.shutdown(wait=False, cancel_futures=True)
         local_timestamp = snapshot_datetime(snapshot)
         if last_log:
             log_timestamp = timestamp_from_log(last_log)
@@ -214,24 +298,30 @@ class BackupConfig(RcloneMixin):
         except NoFullDiskAccess:
             app.notify_no_full_disk_access(self)
             return False
-        task.perform()
+        try:
+            task.perform()
+        finally:
+            self._backups_performed += 1
+            self._last_backups.clear()
         return True
 
-    RE_SIZE = re.compile(r"^(.+)\/.*_\1_size_(\d+)$")
-
     def print_snapshot_sizes(self):
         size_files = self.list_files(f"/*/{self.name}_*_size_*",
-                                     files_only=True)
+                                     files_only=True, sort=True)
         total = 0
         print(f"Size of snapshots in {self.destination}")
         for path in size_files:
-            timestamp, size_str = self.RE_SIZE.match(path).groups()
-            size = int(size_str)
+            # <timestamp>/<name>_<timestamp>_size_<size>
+            timestamp, size_filename = path.split('/', 1)
+            size = int(size_filename.rsplit('_size_', 1)[1])
             print(f"{timestamp:18} {format_size(size, True):>12}")
             total += size
         print(f"{'Total:':18} {format_size(total, True):>12}")
 
 
+PROGRESS_INTERVAL = 0.1     # seconds
+
+
 class BackupTask(RcloneMixin):
 
     def __init__(self, config, device, snapshot, last_log, app):
@@ -240,8 +330,8 @@ class BackupTask(RcloneMixin):
         self.last_log = last_log
         self._tempdir = TemporaryDirectory()
         self.mount_point = self.mount_snapshot(device, snapshot)
-        self.timestamp = RE_SNAPSHOT.match(snapshot).group(1)
-        self.exclude_queue = Queue(maxsize=1)
+        self.timestamp = snapshot_timestamp(snapshot)
+        self.excluded = Future()     # resolved by the user through the app
 
     def __getattr__(self, name):
         # if attribute isn't set in this class, look it up in the configuration
@@ -316,10 +406,10 @@ class BackupTask(RcloneMixin):
         run([UMOUNT, self.mount_point], check=True)
 
     def get_user_feedback(self, tree):
-        backup_size = tree.transfer_size
-        large_entries = (sorted(tree.large_entries(self.threshold),
-                                key=lambda e: e.transfer_size, reverse=True)
+        # large_entries determines the directories' transfer sizes on the way
+        large_entries = (tree.large_entries(self.threshold)
                          if self.threshold else [])
+        backup_size = tree.transfer_size
         if large_entries:
             with self.large_files_path.open('w') as f:
                 for entry in large_entries:
@@ -327,7 +417,7 @@ class BackupTask(RcloneMixin):
                     suffix = '/' if isinstance(entry, Directory) else ''
                     print(f'{size}   {entry.path}{suffix}', file=f)
             self._app.threshold_exceeded(self, backup_size, large_entries)
-            exclude = self.exclude_queue.get()
+            exclude = self.excluded.result()
             if exclude is None:     # user skipped the backup
                 backup_size = None
             else:
@@ -336,37 +426,47 @@ class BackupTask(RcloneMixin):
             exclude = []
         return backup_size, exclude
 
-    def sync_popen(self, *args, dry_run=False):
+    def sync_popen(self, *args, dry_run=False, track_renames=True):
         _, volume = self.source_device_volume
         source_root = '/' if volume == '/System/Volumes/Data' else volume
         snapshot_source = self.mount_point / self.source.relative_to(source_root)
         extra = list(chain(['--bwlimit', self.bwlimit] if self.bwlimit else [],
+                           ['--transfers', str(self.transfers)]
+                           if self.transfers else [],
+                           ['--checkers', str(self.checkers)]
+                           if self.checkers else [],
                            ['--dry-run'] if dry_run else [],
                            ['--progress'] if self.progress else []))
+        if track_renames:
+            extra += ['--track-renames', '--track-renames-strategy', 'modtime,leaf']
         cmd = [self.rclone_path, 'sync', '--use-json-log', '--log-level', 'INFO',
-               '--fast-list', '--links', '--track-renames',
-               '--track-renames-strategy', 'modtime,leaf', *args, *extra,
+               '--fast-list', '--links', *args, *extra,
                snapshot_source, self.destination_latest]
         if self.echo:
             print(' '.join(map(str, cmd)))
-        return Popen(cmd, stderr=PIPE)
+        # with close_fds=False (and an executable path), subprocess uses
+        # posix_spawn instead of forking this big process, which has grown
+        # large by the time the sync starts. The trade-off: descriptors that
+        # AppKit or other C libraries opened without FD_CLOEXEC leak into
+        # rclone (Python's own are non-inheritable, PEP 446). The short-lived
+        # commands run through _run keep the default close_fds=True.
+        return Popen(cmd, stderr=PIPE, close_fds=False)
 
     def backup_scout(self):
         args = ['--retries', '1']
+        if not self.progress:   # the periodic stats are of no use in the log
+            args.extend(['--stats', '0'])
         if self.exclude_file.exists():
             args.extend(['--exclude-from', self.exclude_file])
+        scout_log = self.file_path('scout', 'log')
         try:
             scout = self.sync_popen(*args, dry_run=True)
-            scout_log = self.file_path('scout', 'log')
-            with scout_log.open('wb') as log:
+            with scout_log.open('wb', buffering=LOG_BUFFER_SIZE) as log:
                 tree = scout_log_to_tree(self.source, scout.stderr, log)
         except CalledProcessError as cpe:
             # TODO: interpret rclone_sync.returncode
             raise
-        try:    # FIXME: why doesn't rclone always exit when sync is complete?
-            scout.wait(timeout=3)
-        except TimeoutExpired:
-            scout.terminate()
+        wait_or_terminate(scout)
         tree.write_ncdu_export(self.scout_ncdu_export_path)
         return tree
 
@@ -374,24 +474,28 @@ class BackupTask(RcloneMixin):
         # FIXME: abort subprocesses on App quit
     def backup_sync(self, tree, exclude):
         files_txt = self.file_path('files', 'txt')
-        with files_txt.open('w') as files:
-            for file in tree.iter_files(exclude=exclude):
-                print(file.path, file=files)
-                if file.path.suffix == '.rclonelink':   # rclone issue #6855
-                    print(file.path.with_suffix(''), file=files)
+        with files_txt.open('wb', buffering=LOG_BUFFER_SIZE) as files:
+            files.writelines(files_from_raw_lines(tree.iter_files(exclude=exclude)))
         backupdir_args = (['--backup-dir', self.backup_directory]
                           if self.backup_directory else [])
+        sync_log = self.file_path('sync', 'log')
         try:
+            # a file can only have been renamed if another one was removed
             sync = self.sync_popen('--files-from-raw', files_txt,
-                                   *backupdir_args, dry_run=self.dry_run)
+                                   *backupdir_args, dry_run=self.dry_run,
+                                   track_renames=tree.has_removals)
             transferred = 0
-            sync_log = self.file_path('sync', 'log')
-            with sync_log.open('wb') as log:
+            last_update = 0
+            with sync_log.open('wb', buffering=LOG_BUFFER_SIZE) as log:
                 it = sync_log_to_tree(tree, sync.stderr, log, self.dry_run)
                 sync_tree = next(it)
                 for item in it:
                     transferred += item.size
-                    self._app.update_progress(self, transferred)
+                    # limit the rate of (main thread) UI updates
+                    if (now := monotonic()) - last_update > PROGRESS_INTERVAL:
+                        self._app.update_progress(self, transferred)
+                        last_update = now
+            self._app.update_progress(self, transferred)
             sync_tree.write_ncdu_export(self.sync_ncdu_export_path)
         except CalledProcessError as cpe:
             rc = cpe.returncode
@@ -399,47 +503,81 @@ class BackupTask(RcloneMixin):
             print(f"rclone returned non-zero exit status {rc} - {info}")
             print(f"The log file is {sync_log}")
             return False
-        try:    # FIXME: why doesn't rclone always exit when sync is complete?
-            sync.wait(timeout=3)
-        except TimeoutExpired:
-            sync.terminate()
+        wait_or_terminate(sync)
         transferred_filename = f'{self.name}_{self.timestamp}_transferred_{transferred}'
         self.rclone('touch', self.destination / transferred_filename)
         return True
 
     def continue_backup(self, excluded):
-        self.exclude_queue.put_nowait(excluded)
+        self.excluded.set_result(excluded)
 
     def skip_backup(self):
-        self.exclude_queue.put_nowait(None)
+        self.excluded.set_result(None)
 
     def finalize(self):
         if self.backup_directory:
             # move the logs from the last backup to the backup dir
-            last_logs = '/' + self.last_log.replace('sync.log', '*')
-            self.rclone('move', '--include', last_logs,
-                        self.destination, self.backup_directory)
+            last_logs_glob = '/' + self.last_log.replace('sync.log', '*')
+            last_logs = self.list_files(last_logs_glob, recursive=False,
+                                        files_only=True)
+            self.transfer_files('move', last_logs,
+                                self.destination, self.backup_directory)
             self.record_backup_size(self.backup_directory)
         # copy logs for this backup to the remote
-        local_logs = self.file_path('*', '*')
-        self.rclone('copy', '--include', local_logs.name,
-                    local_logs.parent, self.destination)
+        prefix = f'{self.name}_{self.timestamp}_'  # see file_path
+        with os.scandir(self.logs_path) as entries:
+            local_logs = [entry.name for entry in entries
+                          if entry.name.startswith(prefix) and entry.is_file()]
+        self.transfer_files('copy', local_logs, self.logs_path, self.destination)
 
     def record_backup_size(self, backupdir):
         size_cmd = self.rclone('size', '--json', backupdir, capture=True)
-        size = 0 if self.dry_run else json.loads(size_cmd.stdout)['bytes']
+        size = 0 if self.dry_run else json_loads(size_cmd.stdout)['bytes']
         size_filename = f'{self.name}_{backupdir.name}_size_{size}'
         self.rclone('touch', backupdir / size_filename)
 
 
+def files_from_raw_lines(files):
+    """Encode the paths of `files` for passing to rclone's --files-from-raw"""
+    for file in files:
+        yield file.path.encode() + b'\n'
+        if isinstance(file, Link):      # rclone issue #6855
+            yield file.path.removesuffix('.rclonelink').encode() + b'\n'
+
+
 RE_RENAMED_FROM = re.compile('Renamed from "(.*)"')
 
+# extract the few fields we need from rclone's JSON messages without decoding
+# them completely; the order of the fields differs between rclone versions
+RE_OBJECT = re.compile(rb'"object":"((?:[^"\\]|\\.)*)"')
+RE_SIZE = re.compile(rb'"size":(\d+)')
+RE_SKIPPED = re.compile(rb'"skipped":"([^"\\]*)"')
+
+
+def object_path(match):
+    path = match.group(1)
+    return json_loads(b'"' + path + b'"') if b'\\' in path else path.decode()
+
+
+def skipped_fields(line):
+    """Return the path, size and skipped action in a message, if present"""
+    skipped = RE_SKIPPED.search(line)
+    if not skipped or skipped.group(1) == b'remove directory':
+        return None
+    if (path := RE_OBJECT.search(line)) and (size := RE_SIZE.search(line)):
+        return object_path(path), int(size.group(1)), skipped.group(1).decode()
+
 
-def scout_log_to_tree(root_path, lines, log_file=None):
+def scout_log_to_tree(root_path, stream, log_file=None):
     tree = Root(root_path)
-    for line in lines:
-        if log_file:
-            log_file.write(line)
+    for line in read_lines(stream, log_file):
+        if (line.startswith(b'{') and b'"skipped"' not in line
+                and b'Renamed from' not in line):
+            continue    # not a message we act upon; don't bother parsing it
+        if fields := skipped_fields(line):
+            path, size, action = fields
+            tree.add_file(path, size, action=action)
+            continue
         if not (msg := try_json(line)):
             print(line)
             continue
@@ -450,32 +588,102 @@ def scout_log_to_tree(root_path, lines, log_file=None):
         elif m := RE_RENAMED_FROM.fullmatch(msg['msg']):
             source = m.group(1)
             tree.add_file(msg['object'], 0, action='move-dest', source=source)
-            tree.get(source).metadata['destination'] = msg['object']
+            tree.files[source].metadata = dict(destination=msg['object'])
     return tree
 
 
-def sync_log_to_tree(scout_tree, lines, log_file=None, dry_run=False):
+def sync_log_to_tree(scout_tree, stream, log_file=None, dry_run=False):
     sync_tree = Root(scout_tree.source_path)
     yield sync_tree
-    for line in lines:
-        if log_file:
-            log_file.write(line)
-        if not (msg := try_json(line)):
+    markers = (b'Copied', b'"error"') + ((b'"skipped"', ) if dry_run else ())
+    for line in read_lines(stream, log_file):
+        # most lines report checked/unchanged files; don't bother parsing them
+        if line.startswith(b'{') and not any(m in line for m in markers):
+            continue
+        if b'"msg":"Copied' in line and (match := RE_OBJECT.search(line)):
+            file_path = object_path(match)
+        elif not (msg := try_json(line)):
             print(line)
             continue
-        if (msg['msg'].startswith('Copied')
+        elif (msg['msg'].startswith('Copied')
                 or (dry_run and msg.get('skipped') == 'copy')):
             file_path = msg['object']
-            item = scout_tree.get(file_path)
-            sync_tree.add_file(file_path, item.size, action='copy')
-            yield item
-        elif msg['level'] == 'error':
-            print('ERROR:', msg['msg'])
+        else:
+            if msg['level'] == 'error':
+                print('ERROR:', msg['msg'])
+            continue
+        item = scout_tree.files[file_path]
+        sync_tree.add_file(file_path, item.size, action='copy')
+        yield item
+
+
+READ_SIZE = 1 << 20
+READ_QUEUE_SIZE = 16        # chunks; beyond that, the pipe holds back rclone
+LOG_BUFFER_SIZE = 1 << 20   # collect many chunks of output per log write
+
+
+def read_lines(stream, log_file=None):
+    """Iterate over the lines in `stream`, which is read in a separate thread
+
+    The reader thread also writes the data to `log_file`. This way, reading
+    rclone's output and writing the log overlaps with processing the lines.
+    Reading large chunks using os.read and splitting them into lines is a lot
+    cheaper than reading the stream line by line.
+    """
+    queue = Queue(maxsize=READ_QUEUE_SIZE)
+    lock = Lock()
+    stopped = False
+
+    def put(item):
+        while not stopped:  # give up once the consumer is gone
+            try:
+                queue.put(item, timeout=0.1)
+                return
+            except Full:
+                pass
+
+    def reader():
+        fd = os.dup(stream.fileno())    # the caller might close stream early
+        try:
+            partial_line = b''
+            while chunk := os.read(fd, READ_SIZE):
+                with lock:
+                    if stopped:
+                        return
+                    if log_file:
+                        log_file.write(chunk)
+                *lines, partial_line = (partial_line + chunk).split(b'\n')
+                put(lines)
+            if partial_line:    # no newline at the end of the stream
+                put([partial_line])
+            put(None)
+        except Exception as exception:  # e.g. disk full; don't leave the
+            put(exception)              #  consumer waiting for the sentinel
+        finally:
+            os.close(fd)
+
+    Thread(target=reader, daemon=True).start()
+    try:
+        while (lines := queue.get()) is not None:
+            if isinstance(lines, Exception):
+                raise lines
+            yield from lines
+    finally:    # the caller might close log_file after this
+        with lock:
+            stopped = True
+
+
+def wait_or_terminate(process, timeout=3):
+    # FIXME: why doesn't rclone always exit when sync is complete?
+    try:
+        process.wait(timeout=timeout)
+    except TimeoutExpired:
+        process.terminate()
 
 
 def try_json(line):
     try:
-        return json.loads(line)
+        return json_loads(line)
     except json.JSONDecodeError:
         return None
 
@@ -502,7 +710,7 @@ RCLONE_EXIT_CODES = {
 class RcloneError(Exception):
     """Error reported by rclone"""
     def __init__(self, returncode, log_entry):
-        super().__init__()
+        super().__init__(log_entry['msg'])
         self.returncode = returncode
         self.log_entry = log_entry
 
@@ -3,6 +3,7 @@ import tomllib
 
 from datetime import timedelta
 from pathlib import Path
+from shutil import which
 
 from .backup import BackupConfig
 from .util import EXPONENTS
@@ -16,8 +17,11 @@ class Configuration(dict):
         self.dry_run = dry_run
         with config_path.open('rb') as f:
             self.toml = tomllib.load(f)
-        self.rclone = self.toml.get('rclone', 'rclone')
+        rclone = self.toml.get('rclone', 'rclone')
+        self.rclone = which(rclone) or rclone  # for posix_spawn (sync_popen)
         self.bwlimit = self.toml.get('bwlimit', None)
+        self.transfers = self._parse_count('transfers', 16)
+        self.checkers = self._parse_count('checkers', 16)
         self.keep_all = self._parse_keep('keep_all', '7 days')
         self.keep_daily = self._parse_keep('keep_daily', '31 days')
         for key, value in self.toml.items():
@@ -31,15 +35,22 @@ class Configuration(dict):
 
     def _parse_keep(self, attribute, default):
         value = self.toml.get(attribute, default)
-        keep_match = RE_KEEP.fullmatch(value.strip())
+        keep_match = RE_KEEP.fullmatch(value)
         try:
             return int(keep_match.group('days'))
         except AttributeError:
             self._syntax_error(attribute)
 
+    def _parse_count(self, attribute, default, name=None, config=None):
+        value = (self.toml if config is None else config).get(attribute, default)
+        # bool is a subclass of int, but TOML's true/false aren't counts
+        if not isinstance(value, int) or isinstance(value, bool) or value < 1:
+            self._syntax_error(attribute, section=name)
+        return value
+
     def _parse_interval(self, name, config):
         try:
-            interval_match = RE_INTERVAL.fullmatch(config['interval'].strip())
+            interval_match = RE_INTERVAL.fullmatch(config['interval'])
         except KeyError:
             return None
         try:
@@ -54,27 +65,33 @@ class Configuration(dict):
         threshold = cfg.get('threshold')
         if threshold:
             try:
-                threshold_match = RE_THRESHOLD.fullmatch(threshold.strip())
+                threshold_match = RE_THRESHOLD.fullmatch(threshold)
                 exp = EXPONENTS[threshold_match.group('unit')]
                 threshold = int(threshold_match.group('number')) * 2**exp
             except TypeError:
                 pass    # threshold is a number
             except AttributeError:
                 self._syntax_error('threshold', section=name)
+        transfers = self._parse_count('transfers', self.transfers,
+                                     name, cfg)
+        checkers = self._parse_count('checkers', self.checkers, name, cfg)
         return BackupConfig(name, src, dest, interval, threshold,
-                            bwlimit=self.bwlimit, rclone=self.rclone,
+                            bwlimit=self.bwlimit, transfers=transfers,
+                            checkers=checkers, rclone=self.rclone,
                             echo=self.echo, progress=self.progress,
                             dry_run=self.dry_run)
 
 
-RE_KEEP = re.compile(r'(?P<days>\d+)\s*(d(ays?)?)?', re.IGNORECASE)
+RE_KEEP = re.compile(r'\s*(?P<days>\d+)\s*(d(ays?)?)?\s*',
+                     re.IGNORECASE | re.ASCII)
 
-RE_INTERVAL = re.compile(r'((?P<days>\d+?)\s*(d|days?))?\s*'
+RE_INTERVAL = re.compile(r'\s*((?P<days>\d+?)\s*(d|days?))?\s*'
                          r'((?P<hours>\d+?)\s*(h|hours?))?\s*'
-                         r'((?P<minutes>\d+?)\s*(m|minutes?))?', re.IGNORECASE)
+                         r'((?P<minutes>\d+?)\s*(m|minutes?))?\s*',
+                         re.IGNORECASE | re.ASCII)
 
-RE_THRESHOLD = re.compile(r'(?P<number>\d+)\s*(?P<unit>[KMGT])B?',
-                          re.IGNORECASE)
+RE_THRESHOLD = re.compile(r'\s*(?P<number>\d+)\s*(?P<unit>[KMGT])B?\s*',
+                          re.IGNORECASE | re.ASCII)
 
 
 CONFIG_TEMPLATE = f"""\
@@ -83,6 +100,10 @@ CONFIG_TEMPLATE = f"""\
 
 # rclone = "/usr/local/bin/rclone"
 # bwlimit = "400K"
+## number of file transfers and checkers run in parallel (rclone's --transfers
+## and --checkers); can be overridden for individual backup configurations
+# transfers = 16
+# checkers = 16
 
 
 ## Backup configurations
@@ -1,39 +1,63 @@
 
-import json
+from operator import attrgetter
+from sys import intern
+from types import MappingProxyType
 
-from functools import cached_property
-from itertools import chain
-from pathlib import Path
+from .util import json_dumps
+
+try:
+    from fcntl import fcntl, F_NOCACHE
+except ImportError:     # not macOS
+    F_NOCACHE = None
+
+
+NO_METADATA = MappingProxyType({})  # shared by the (many) entries without any
+EXPORT_BUFFER_SIZE = 1 << 20        # the export is written in many tiny pieces
 
 
 class Entry:
+    __slots__ = ('path', 'size', 'action', 'metadata')
+
     def __init__(self, path, size=None, action=None, **metadata):
         self.path = path
         self.size = size
         self.action = action
-        self.metadata = metadata
+        self.metadata = metadata or NO_METADATA
 
     @property
     def transfer_size(self):
         raise NotImplementedError
 
     def large_entries(self, threshold):
+        """The innermost entries with a transfer size exceeding `threshold`
+
+        A directory is only included when none of its entries is large.
+
+        Returns:
+          list of entries, sorted by decreasing transfer size
+        """
+        large_entries = []
+        self._find_large_entries(threshold, large_entries)
+        large_entries.sort(key=attrgetter('transfer_size'), reverse=True)
+        return large_entries
+
+    def _find_large_entries(self, threshold, large_entries):
         if self.transfer_size > threshold:
-            yield self
+            large_entries.append(self)
+            return True
+        return False
 
     def to_ncdu(self, name):
         raise NotImplementedError
-        
-        
+
+
 class File(Entry):
+    __slots__ = ()
+
     @property
     def transfer_size(self):
         return self.size if self.action == 'copy' else 0
 
-    def iter_files(self, exclude):
-        if self not in exclude:
-            yield self
-
     def to_ncdu(self, name):
         extra = dict(excluded=self.action) if self.action != 'copy' else {}
         match self.action:
@@ -44,75 +68,140 @@ class File(Entry):
 
 
 class Link(File):
+    __slots__ = ()
+
     def to_ncdu(self, name):
         return dict(name=name, notreg=True)
 
 
 class Directory(Entry):
+    __slots__ = ('entries', '_transfer_size')
+
     def __init__(self, path):
         super().__init__(path)
         self.entries = {}
+        self._transfer_size = None
 
     def get(self, path: str) -> Entry:
-        return self._get(path.split('/'))
-
-    def _get(self, parts):
-        name, *rest = parts
-        return self.entries[name]._get(rest) if rest else self.entries[name]
-
-    def add_file(self, path, size, action, **metadata):
-        path = Path(path)
-        link = path.name.endswith('.rclonelink')
-        return self._add_file(path, path.parts, size, action, link=link,
-                              **metadata)
-
-    def _add_file(self, path, path_parts, size, action, link=False, **metadata):
-        name, *parts = path_parts
-        dir_path = Path(*path.parts[:-len(parts)])
-        if parts:
-            dir = self.entries.setdefault(name, Directory(dir_path))
-            dir._add_file(path, parts, size, action, link=link, **metadata)
+        entry = self
+        for name in path.split('/'):
+            entry = entry.entries[name]
+        return entry
+
+    def add_file(self, path: str, size, action, **metadata):
+        directory = self
+        *dir_names, name = path.split('/')
+        offset = -1
+        for dir_name in dir_names:
+            offset += len(dir_name) + 1
+            entries = directory.entries
+            directory = entries.get(dir_name)
+            if directory is None:
+                # directory names (Library, Caches, ...) recur all over the tree
+                directory = entries[intern(dir_name)] = Directory(path[:offset])
+        entries = directory.entries
+        entry = entries.get(name)
+        if entry is None:
+            link = name.endswith('.rclonelink')
+            entry = entries[name] = (Link if link else File)(path, size, action,
+                                                             **metadata)
+        elif entry.action:
+            raise RuntimeError(f"{path} has already been added")
         else:
-            if existing_entry := self.entries.get(name):
-                if existing_entry.action:
-                    raise RuntimeError(f"{path} has already been added")
-                existing_entry.action = action
-            else:
-                entry = (Link if link else File)(path, size, action, **metadata)
-                self.entries[name] = entry
+            entry.action = action
+        return entry
 
-    @cached_property
-    def transfer_size(self):
-        return sum((e.transfer_size for e in self.entries.values()), start=0)
+    def _directories(self):
+        """This directory and all directories below it, parents first"""
+        directories = [self]
+        for directory in directories:   # extended while iterating over it
+            directories.extend(entry for entry in directory.entries.values()
+                               if isinstance(entry, Directory))
+        return directories
 
-    def large_entries(self, threshold):
-        large_children = chain(*(entry.large_entries(threshold)
-                                 for entry in self.entries.values()))
-        try:
-            yield next(large_children)
-            yield from large_children
-        except StopIteration:   # large_children is empty
-            yield from super().large_entries(threshold)
+    @property
+    def transfer_size(self):
+        if self._transfer_size is None:
+            # the tree can be very deep, so traverse it without recursion
+            for directory in reversed(self._directories()):
+                directory._transfer_size = sum(
+                    (e.transfer_size for e in directory.entries.values()),
+                    start=0)
+        return self._transfer_size
+
+    def _find_large_entries(self, threshold, large_entries):
+        # also determines the transfer sizes, saving a separate traversal
+        with_large_entries = set()
+        for directory in reversed(self._directories()):
+            transfer_size = 0
+            found = False
+            for entry in directory.entries.values():
+                if isinstance(entry, Directory):
+                    found |= entry in with_large_entries
+                else:
+                    found |= entry._find_large_entries(threshold, large_entries)
+                transfer_size += entry.transfer_size
+            directory._transfer_size = transfer_size
+            if not found and transfer_size > threshold:
+                large_entries.append(directory)     # innermost large entry
+                found = True
+            if found:
+                with_large_entries.add(directory)
+        return self in with_large_entries
 
     def iter_files(self, exclude):
-        if self not in exclude:
-            if self.action:
-                yield self
-            for entry in self.entries.values():
-                yield from entry.iter_files(exclude)
-
-    def to_ncdu(self, name):
-        return [dict(name=name),
-                *(entry.to_ncdu(name) for name, entry in self.entries.items())]
+        exclude = set(exclude)  # entries compare (and hash) by identity
+        stack = [self]
+        while stack:
+            entry = stack.pop()
+            if entry in exclude:
+                continue
+            if isinstance(entry, Directory):
+                if entry.action:
+                    yield entry
+                stack.extend(reversed(entry.entries.values()))
+            else:
+                yield entry
+
+    def write_ncdu(self, file, name):
+        # depth-first using an explicit stack; None closes a directory's list
+        stack = [(b'', name, self)]
+        while stack:
+            if (item := stack.pop()) is None:
+                file.write(b']')
+                continue
+            separator, name, entry = item
+            if isinstance(entry, Directory):
+                file.write(separator + b'[' + json_dumps(dict(name=name)))
+                stack.append(None)
+                stack.extend((b',', child_name, child) for child_name, child
+                             in reversed(entry.entries.items()))
+            else:
+                file.write(separator + json_dumps(entry.to_ncdu(name)))
 
 
 class Root(Directory):
+    __slots__ = ('source_path', 'files', 'has_removals')
+
     def __init__(self, source_path):
         super().__init__('')
         self.source_path = source_path
-    
+        self.files = {}     # path -> entry, for all entries added by add_file
+        self.has_removals = False   # whether files are deleted or moved
+
+    def add_file(self, path: str, size, action, **metadata):
+        entry = super().add_file(path, size, action, **metadata)
+        self.files[path] = entry
+        if action in ('delete', 'move'):
+            self.has_removals = True
+        return entry
+
     def write_ncdu_export(self, ncdu_export_path):
-        ncdu = [1, 2, dict(progname='thriftybackup', progver='0.0.0', timestamp=0),
-                self.to_ncdu(str(self.source_path))]
-        with ncdu_export_path.open('w') as f:
-            json.dump(ncdu, f)
+        # written piecewise to avoid building the export in memory first
+        info = dict(progname='thriftybackup', progver='0.0.0', timestamp=0)
+        with ncdu_export_path.open('wb', buffering=EXPORT_BUFFER_SIZE) as f:
+            if F_NOCACHE:   # only read when the user asks to show the files
+                fcntl(f.fileno(), F_NOCACHE, 1)
+            f.write(b'[1,2,' + json_dumps(info) + b',')
+            self.write_ncdu(f, str(self.source_path))
+            f.write(b']')
@@ -1,13 +1,24 @@
+from functools import lru_cache
+
+try:
+    from orjson import dumps as json_dumps, loads as json_loads
+except ImportError:     # orjson is optional; fall back to the standard library
+    import json
+
+    json_loads = json.loads
+
+    def json_dumps(obj):
+        return json.dumps(obj, ensure_ascii=False,
+                          separators=(',', ':')).encode()
 
 
 PREFIXES = {40: 'T', 30: 'G', 20: 'M', 10: 'K', 0: ' '}
 EXPONENTS = {value: key for key, value in PREFIXES.items()}
 
 
+@lru_cache(maxsize=1024)    # the UI formats the same sizes over and over
 def format_size(n_bytes, align=False):
-    for exp, prefix in PREFIXES.items():
-        if n_bytes > 2**exp:
-            break
-        if not align:
-            prefix = prefix.strip()
-    return f'{n_bytes / 2**exp:{8 if align else 0}.02f} {prefix}B'
+    # the largest exponent for which n_bytes > 2**exp, rounded down to 10s
+    exp = min(max(0, (n_bytes - 1).bit_length() - 1) // 10 * 10, 40)
+    prefix = PREFIXES[exp] if align else PREFIXES[exp].strip()
+    return f'{n_bytes / (1 << exp):{8 if align else 0}.02f} {prefix}B'